@@ -1,24 +1,18 @@
-import typer
-from rich import print
-from src.query_engine import ask_question
-
-app = typer.Typer(
-    add_completion=False,
-    help="AI Sales Insight Assistant (conversational analytics over sales data)"
-)
-
-@app.callback(invoke_without_command=True)
-def main(
-    q: str = typer.Argument(
-        ...,
-        help="Enter your question, e.g. 'profit by region this year'"
-    ),
-    csv_path: str = typer.Option(
-        "data/Sample - Superstore.csv",
-        "--csv",
-        help="Path to your Superstore CSV"
-    )
-):
+from __future__ import annotations
+
+import sys
+
+# ANSI styles, only used when writing to a terminal (no Rich import needed)
+GREY = "\033[90m"
+BOLD_CYAN = "\033[1;36m"
+RESET = "\033[0m"
+
+
+def _say(text: str, style: str) -> None:
+    print(f"{style}{text}{RESET}" if sys.stdout.isatty() else text)
+
+
+def main(q: str, csv_path: str = "data/Sample - Superstore.csv") -> None:
     """
     Ask a natural-language question about sales or profit.
     Examples:
@@ -26,10 +20,38 @@ def main(
       python -m src.chatbot "profit by region this year"
       python -m src.chatbot "top 3 categories by sales in 2017"
     """
-    print("[grey]Thinking → Parsing your question...[/]")
+    from src.query_engine import SalesQueryEngine, ask_question
+
+    SalesQueryEngine.warmup(csv_path)
+    _say("Thinking → Parsing your question...", GREY)
     answer = ask_question(q, csv_path)
-    print(f"[bold cyan]{answer}[/]")
+    _say(answer, BOLD_CYAN)
 
-if __name__ == "__main__":
-    app()
 
+def _build_app():
+    import typer
+
+    app = typer.Typer(
+        add_completion=False,
+        help="AI Sales Insight Assistant (conversational analytics over sales data)"
+    )
+
+    @app.callback(invoke_without_command=True)
+    def cli(
+        q: str = typer.Argument(
+            ...,
+            help="Enter your question, e.g. 'profit by region this year'"
+        ),
+        csv_path: str = typer.Option(
+            "data/Sample - Superstore.csv",
+            "--csv",
+            help="Path to your Superstore CSV"
+        )
+    ):
+        main(q, csv_path)
+
+    return app
+
+
+if __name__ == "__main__":
+    _build_app()()
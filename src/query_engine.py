@@ -1,5 +1,9 @@
+import glob
+import os
 import re
-from typing import Dict, Optional, Tuple, List, Any
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, List, Any, NamedTuple
+import numpy as np
 import pandas as pd
 
 # --------------------------------
@@ -17,21 +21,163 @@ US_ABBR_TO_STATE = {
     "WV":"West Virginia","WI":"Wisconsin","WY":"Wyoming","DC":"District Of Columbia"
 }
 
+MONTH_ABBR = {
+    1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun",
+    7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec",
+}
+
+# Precompiled question patterns
+_RE_YEAR = re.compile(r"(?:in|for)?\s*(20\d{2}|19\d{2})")
+_RE_TOPN = re.compile(r"top\s+(\d+)\s+(categories|category|products|product|regions|states)")
+_RE_CAT = re.compile(r"\bcategory\s+([a-z][a-z\s\-]+)", re.IGNORECASE)
+_RE_PUNCT = re.compile(r"[^\w\s\-]")
+
+# "in <abbr|state name>" — one alternation over known states only (longest first)
+_STATE_LOOKUP = {
+    **{abbr.lower(): name for abbr, name in US_ABBR_TO_STATE.items()},
+    **{name.lower(): name for name in US_ABBR_TO_STATE.values()},
+}
+_STATE_RE = re.compile(
+    r"\bin\s+("
+    + "|".join(
+        re.escape(tok).replace(r"\ ", r"\s+")
+        for tok in sorted(US_ABBR_TO_STATE, key=len, reverse=True)
+        + sorted(US_ABBR_TO_STATE.values(), key=len, reverse=True)
+    )
+    + r")\b",
+    re.IGNORECASE,
+)
+
+# Any other "in <place>" phrase (up to a query keyword); not a state, so it must not be dropped
+_PLACE_STOP_WORDS = {"by", "for", "in", "during", "and", "with", "top", "category", "last", "this", "ytd"}
+_RE_PLACE = re.compile(
+    r"\bin\s+(?:the\s+)?([a-z][a-z\-]*(?:\s+(?!(?:"
+    + "|".join(sorted(_PLACE_STOP_WORDS))
+    + r")\b)[a-z][a-z\-]*)*)"
+)
+
+# Order Date layouts tried against a sample, most common (US Superstore) first
+DATE_FORMATS = ["%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d", "%m-%d-%Y", "%d-%m-%Y"]
+
+# Bump whenever _parse_sales_csv output changes so stale Parquet sidecars are ignored
+_SIDECAR_VERSION = 6
+
+# Low-cardinality text columns stored as pandas Categorical
+CATEGORICAL_COLUMNS = ["State", "Region", "Category", "Sub-Category", "Product"]
+
+# Dimensions pre-summed per (dim, Year) at engine construction
+CUBE_DIMENSIONS = ["Region", "State", "Category", "Product", "Month"]
+
 # -------------------------------
 # Robust CSV Loader + Normalizer
 # -------------------------------
 def _load_sales(csv_path: str) -> pd.DataFrame:
+    """Load the sales frame, reusing a Parquet sidecar cached for this CSV mtime."""
+    sidecar = f"{csv_path}.{os.stat(csv_path).st_mtime_ns}.v{_SIDECAR_VERSION}.parquet"
+    if os.path.exists(sidecar):
+        try:
+            return pd.read_parquet(sidecar, memory_map=True)
+        except (ImportError, OSError, ValueError):
+            pass
+
+    df = _parse_sales_csv(csv_path)
+    try:
+        df.to_parquet(sidecar, compression="zstd")
+    except (ImportError, OSError, ValueError):
+        # No parquet engine or read-only location: just skip the cache
+        return df
+
+    # Drop sidecars left behind by earlier CSV edits or sidecar versions
+    for stale in glob.glob(f"{glob.escape(csv_path)}.*.parquet"):
+        if stale != sidecar:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return df
+
+
+def _detect_encoding(csv_path: str, sample_size: int = 65536) -> str:
+    """Guess the file encoding from a BOM or a decode test on the first 64 KiB."""
+    with open(csv_path, "rb") as f:
+        head = f.read(sample_size)
+    if head.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    try:
+        head.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as exc:
+        # A multi-byte char cut off at the sample boundary is still UTF-8
+        if len(head) == sample_size and exc.start >= sample_size - 3:
+            return "utf-8"
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(head).best()
+        if best is not None:
+            return best.encoding
+    except ImportError:
+        pass
+    try:
+        head.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def _parse_order_dates(values: pd.Series, sample_size: int = 100) -> pd.Series:
+    """Parse with the first sample-compatible format that leaves no extra NaT on the full column."""
+    if values.dtype == object:
+        values = values.str.strip()
+    sample = values.dropna().astype(str).head(sample_size)
+    candidates = [
+        fmt for fmt in DATE_FORMATS
+        if pd.to_datetime(sample, format=fmt, errors="coerce").notna().all()
+    ]
+    # A sample with every day <= 12 fits both m/d and d/m, so check the whole column
+    missing = values.isna().sum()
+    best = None
+    for fmt in candidates:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce", cache=True)
+        if parsed.isna().sum() == missing:
+            return parsed
+        if best is None or parsed.isna().sum() < best.isna().sum():
+            best = parsed
+    if best is not None:
+        return best
+    return pd.to_datetime(values, format="mixed", errors="coerce")
+
+
+def _read_csv(csv_path: str, encoding: str) -> pd.DataFrame:
+    """Parse with pyarrow's multithreaded reader, falling back to pandas' C engine."""
+    try:
+        df = pd.read_csv(csv_path, encoding=encoding, engine="pyarrow")
+    except (ImportError, ValueError):
+        # pyarrow missing, or input it rejects (ragged rows)
+        return pd.read_csv(csv_path, encoding=encoding)
+    # pyarrow does not raise on undecodable text: the whole column comes back as binary
+    for col in df.select_dtypes(include="object").columns:
+        first = df[col].first_valid_index()
+        if first is not None and isinstance(df[col].at[first], bytes):
+            # The C engine raises UnicodeDecodeError, so the caller's encoding fallback runs
+            return pd.read_csv(csv_path, encoding=encoding)
+    return df
+
+
+def _parse_sales_csv(csv_path: str) -> pd.DataFrame:
     """Load Superstore-like CSV with fallback encodings and normalized columns."""
-    encodings = ["utf-8", "utf-8-sig", "cp1252", "latin1"]
-    df = None
-    for enc in encodings:
+    try:
         try:
-            df = pd.read_csv(csv_path, encoding=enc)
-            break
-        except Exception:
-            continue
-    if df is None:
-        raise ValueError("Could not read CSV file with common encodings.")
+            df = _read_csv(csv_path, _detect_encoding(csv_path))
+        except UnicodeDecodeError:
+            # Sample looked clean but a later byte did not: cp1252, then latin1 (decodes anything)
+            try:
+                df = _read_csv(csv_path, "cp1252")
+            except UnicodeDecodeError:
+                df = _read_csv(csv_path, "latin1")
+    except Exception as exc:
+        raise ValueError("Could not read CSV file with common encodings.") from exc
 
     # Clean headers
     df.columns = [c.strip() for c in df.columns]
@@ -49,9 +195,7 @@ def _load_sales(csv_path: str) -> pd.DataFrame:
         "Product Name": "Product",
         "Product": "Product",
     }
-    for src, dst in rename_map.items():
-        if src in df.columns:
-            df = df.rename(columns={src: dst})
+    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
 
     # Build product name fallback
     if "Product" not in df.columns:
@@ -63,23 +207,84 @@ def _load_sales(csv_path: str) -> pd.DataFrame:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    # Parse date
+    # Parse date (vectorized, explicit format checked on a sample and the full column)
     if "OrderDate" in df.columns:
-        parsed = pd.to_datetime(df["OrderDate"], errors="coerce", dayfirst=True)
-        mask_nat = parsed.isna()
-        if mask_nat.any():
-            parsed2 = pd.to_datetime(df.loc[mask_nat, "OrderDate"], errors="coerce", dayfirst=False)
-            parsed.loc[mask_nat] = parsed2
-        df["OrderDate"] = parsed
-
-        df["Year"] = df["OrderDate"].dt.year
-        df["Month"] = df["OrderDate"].dt.month
-        df["MonthName"] = df["OrderDate"].dt.strftime("%b")
-        df["MonthIndex"] = df["OrderDate"].dt.month
+        if not pd.api.types.is_datetime64_any_dtype(df["OrderDate"]):
+            df["OrderDate"] = _parse_order_dates(df["OrderDate"])
+
+        # Smallest int dtype that fits (int16 / int8); stays float if any date is NaT
+        df["Year"] = pd.to_numeric(df["OrderDate"].dt.year, downcast="integer")
+        df["Month"] = pd.to_numeric(df["OrderDate"].dt.month, downcast="integer")
+
+        # Sorted by date (NaT last) so time windows are a searchsorted slice
+        df = df.sort_values("OrderDate", kind="mergesort", ignore_index=True)
+
+    # Categorical dtype: filters compare small int codes instead of strings
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
 
     return df
 
 
+# -------------------------------
+# Parsed question (immutable, so parse results can be cached)
+# -------------------------------
+class ParsedQuery(NamedTuple):
+    metric: str
+    time_window: Optional[Tuple[pd.Timestamp, pd.Timestamp]]
+    group_dim: Optional[str]
+    topn: Optional[Tuple[int, str]]
+    filters: Tuple[Tuple[str, str], ...]
+
+
+# -------------------------------
+# Category-code row filter (JIT-compiled when numba is installed)
+# -------------------------------
+# Columns the kernel can filter on, by category code
+KERNEL_FILTER_COLUMNS = ("State", "Category")
+
+# Below this many rows the NumPy mask is as fast and numba's import/JIT load dominates
+KERNEL_MIN_ROWS = 1_000_000
+
+# Same idea for the Polars scan: below this, pandas is faster than importing polars
+POLARS_MIN_ROWS = 1_000_000
+
+
+def _filter_loop(state_codes, want_state, cat_codes, want_cat):
+    """Positions of rows whose codes match (-1 = any); one pass, no temp masks."""
+    out = np.empty(len(state_codes), np.int64)
+    k = 0
+    for i in range(len(state_codes)):
+        if want_state >= 0 and state_codes[i] != want_state:
+            continue
+        if want_cat >= 0 and cat_codes[i] != want_cat:
+            continue
+        out[k] = i
+        k += 1
+    return out[:k]
+
+
+@lru_cache(maxsize=1)
+def _get_filter_kernel():
+    """njit-compiled _filter_loop, or None without numba; imported on the first large filtered query."""
+    try:
+        from numba import njit
+    except ImportError:  # optional accelerator; the NumPy mask path is used instead
+        return None
+    return njit(cache=True)(_filter_loop)
+
+
+@lru_cache(maxsize=1)
+def _import_polars():
+    """The polars module, or None; imported on the first grouped query."""
+    try:
+        import polars
+    except ImportError:  # optional accelerator; pandas groupby is used instead
+        return None
+    return polars
+
+
 # -------------------------------
 # Query Engine
 # -------------------------------
@@ -93,16 +298,36 @@ class SalesQueryEngine:
             self.today = self.df["OrderDate"].max().normalize()
         else:
             self.today = pd.Timestamp.today().normalize()
+        # OrderDate as a sorted datetime64[ns] array (NaT last), for binary search
+        self._dates = self.df["OrderDate"].values if "OrderDate" in self.df.columns else None
+
+        # Lowercase label -> category code, per categorical column
+        self._lower_codes = {
+            col: {str(label).lower(): code for code, label in enumerate(self.df[col].cat.categories)}
+            for col in CATEGORICAL_COLUMNS
+            if col in self.df.columns
+        }
+
+        # (dim, metric) -> dim x Year table of sums (or None), filled in by _cube_table
+        self._cube = {}
+        self._whole_days = None
+
+        # Arrow-backed lazy view of the same (date-sorted) rows; built by _polars_frame
+        self._lf = None
+
+    @classmethod
+    def warmup(cls, csv_path: str = "data/Sample - Superstore.csv") -> "SalesQueryEngine":
+        """Return the cached engine for csv_path, loading it on first use."""
+        return _get_engine(csv_path, os.stat(csv_path).st_mtime_ns)
 
     # --------- NLP DETECTORS ---------
+    # Each detector takes the already-lowercased question (see parse)
     @staticmethod
-    def _detect_metric(q: str) -> str:
-        return "Profit" if "profit" in q.lower() else "Sales"
-
-    def _detect_time_window(self, q: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
-        ql = q.lower()
-        today = self.today
+    def _detect_metric(ql: str) -> str:
+        return "Profit" if "profit" in ql else "Sales"
 
+    @staticmethod
+    def _detect_time_window(ql: str, today: pd.Timestamp) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
         if "last month" in ql:
             first_this = today.replace(day=1)
             start = (first_this - pd.offsets.MonthBegin(1)).normalize()
@@ -117,15 +342,14 @@ class SalesQueryEngine:
             y = today.year - 1
             return pd.Timestamp(year=y, month=1, day=1), pd.Timestamp(year=y, month=12, day=31)
 
-        m = re.search(r"(?:in|for)?\s*(20\d{2}|19\d{2})", ql)
+        m = _RE_YEAR.search(ql)
         if m:
             y = int(m.group(1))
             return pd.Timestamp(year=y, month=1, day=1), pd.Timestamp(year=y, month=12, day=31)
         return None
 
     @staticmethod
-    def _detect_dimension(q: str) -> Optional[str]:
-        ql = q.lower()
+    def _detect_dimension(ql: str) -> Optional[str]:
         if " by region" in ql: return "Region"
         if " by state" in ql: return "State"
         if " by category" in ql or "categories" in ql: return "Category"
@@ -134,8 +358,8 @@ class SalesQueryEngine:
         return None
 
     @staticmethod
-    def _detect_topn(q: str) -> Optional[Tuple[int, str]]:
-        m = re.search(r"top\s+(\d+)\s+(categories|category|products|product|regions|states)", q.lower())
+    def _detect_topn(ql: str) -> Optional[Tuple[int, str]]:
+        m = _RE_TOPN.search(ql)
         if not m: return None
         n = int(m.group(1))
         word = m.group(2)
@@ -145,82 +369,188 @@ class SalesQueryEngine:
         return n, "Product"
 
     @staticmethod
-    def _detect_filters(q: str) -> Dict[str, str]:
-        ql = q.lower()
+    def _detect_filters(ql: str) -> Dict[str, str]:
         filters = {}
-        found_state = False
-
-        # Abbreviation first
-        m_abbr = re.search(r"\bin\s+([a-z]{2})(?=\b|[^\w])", ql, flags=re.IGNORECASE)
-        if m_abbr:
-            abbr = m_abbr.group(1).upper()
-            if abbr in US_ABBR_TO_STATE:
-                filters["State"] = US_ABBR_TO_STATE[abbr]
-                found_state = True
-
-        # Full state only if abbreviation not found
-        if not found_state:
-            m_full = re.search(r"\bin\s+([a-z][a-z\s\-]+?)(?=\b|[^\w]|$)", ql, flags=re.IGNORECASE)
-            if m_full:
-                s = re.sub(r"[^\w\s\-]", "", m_full.group(1)).strip().title()
-                if s:
-                    filters["State"] = s
+
+        m_state = _STATE_RE.search(ql)
+        if m_state:
+            filters["State"] = _STATE_LOOKUP[" ".join(m_state.group(1).split())]
+        else:
+            # Unknown place: keep it as a State that matches nothing, so the answer
+            # says "no matching data" instead of silently answering for all states
+            for m_place in _RE_PLACE.finditer(ql):
+                place = m_place.group(1)
+                if place.split()[0] not in _PLACE_STOP_WORDS:
+                    filters["State"] = place.title()
+                    break
 
         # Category filter
-        m_cat = re.search(r"\bcategory\s+([a-z][a-z\s\-]+)", ql, flags=re.IGNORECASE)
+        m_cat = _RE_CAT.search(ql)
         if m_cat:
-            cat = re.sub(r"[^\w\s\-]", "", m_cat.group(1)).strip().title()
+            cat = _RE_PUNCT.sub("", m_cat.group(1)).strip().title()
             if cat:
                 filters["Category"] = cat
         return filters
 
     # --------- CORE FUNCTIONS ---------
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _parse_cached(ql: str, today_ns: int) -> "ParsedQuery":
+        return ParsedQuery(
+            metric=SalesQueryEngine._detect_metric(ql),
+            time_window=SalesQueryEngine._detect_time_window(ql, pd.Timestamp(today_ns)),
+            group_dim=SalesQueryEngine._detect_dimension(ql),
+            topn=SalesQueryEngine._detect_topn(ql),
+            filters=tuple(SalesQueryEngine._detect_filters(ql).items()),
+        )
+
     def parse(self, q: str) -> Dict[str, Any]:
-        return {
-            "metric": self._detect_metric(q),
-            "time_window": self._detect_time_window(q),
-            "group_dim": self._detect_dimension(q),
-            "topn": self._detect_topn(q),
-            "filters": self._detect_filters(q)
-        }
+        # Parsing is pure in (question, today): repeated questions hit the cache
+        ql = " ".join(q.lower().split())
+        parsed = self._parse_cached(ql, self.today.value)
+        return {**parsed._asdict(), "filters": dict(parsed.filters)}
 
-    def _apply_time(self, df: pd.DataFrame, t: Optional[Tuple[pd.Timestamp, pd.Timestamp]]) -> pd.DataFrame:
-        if not t or "OrderDate" not in df.columns: return df
+    def _time_slice(self, t: Optional[Tuple[pd.Timestamp, pd.Timestamp]]) -> slice:
+        if not t or self._dates is None: return slice(None)
         start, end = t
-        return df.loc[(df["OrderDate"] >= start) & (df["OrderDate"] <= end)]
+        lo = np.searchsorted(self._dates, start.to_datetime64(), side="left")
+        hi = np.searchsorted(self._dates, end.to_datetime64(), side="right")
+        return slice(int(lo), int(hi))
+
+    def _filter_mask(self, df: pd.DataFrame, col: str, val: str) -> np.ndarray:
+        if col in self._lower_codes:
+            code = self._lower_codes[col].get(val.lower())
+            if code is None:
+                return np.zeros(len(df), dtype=bool)
+            return df[col].cat.codes.values == code
+        return df[col].astype(str).str.lower().values == val.lower()
+
+    def _kernel_positions(self, kernel, df: pd.DataFrame, filters: Dict[str, str]) -> np.ndarray:
+        args = []
+        for col in KERNEL_FILTER_COLUMNS:
+            codes = df[col].cat.codes.values if col in self._lower_codes else np.zeros(len(df), np.int8)
+            want = -1
+            if col in filters:
+                want = self._lower_codes[col].get(filters[col].lower())
+                if want is None:
+                    return np.empty(0, np.int64)
+            args += [codes, want]
+        return kernel(*args)
 
     def _apply_filters(self, df: pd.DataFrame, filters: Dict[str, str]) -> pd.DataFrame:
+        filters = {col: val for col, val in filters.items() if col in df.columns}
+        if not filters:
+            return df
+        kernel_ok = len(df) >= KERNEL_MIN_ROWS and all(
+            col in KERNEL_FILTER_COLUMNS and col in self._lower_codes for col in filters
+        )
+        kernel = _get_filter_kernel() if kernel_ok else None
+        if kernel is not None:
+            return df.take(self._kernel_positions(kernel, df, filters))
+
+        # One running boolean mask, sliced once at the end (no per-filter frames)
+        mask = np.ones(len(df), dtype=bool)
+        for col, val in filters.items():
+            mask &= self._filter_mask(df, col, val)
+            if not mask.any():
+                return df.iloc[:0]
+        return df.iloc[mask]
+
+    def _select(self, t: Optional[Tuple[pd.Timestamp, pd.Timestamp]], filters: Dict[str, str]) -> pd.DataFrame:
+        # Time window is a contiguous row range (binary search); filters only scan that slice
+        return self._apply_filters(self.df.iloc[self._time_slice(t)], filters)
+
+    def _cube_table(self, dim: str, metric: str) -> Optional[pd.DataFrame]:
+        """dim x Year sums, built on the first query that can use them and memoized."""
+        if (dim, metric) not in self._cube:
+            if self._whole_days is None:
+                # Year sums only equal the inclusive <= Dec 31 bound when dates carry no time part
+                dates = self.df["OrderDate"].dropna() if "OrderDate" in self.df.columns else None
+                self._whole_days = dates is not None and bool((dates.dt.normalize() == dates).all())
+            table = None
+            if self._whole_days and dim in CUBE_DIMENSIONS and dim in self.df.columns and metric in self.df.columns:
+                sums = self.df.groupby([dim, "Year"], observed=True)[metric].sum()
+                table = sums.unstack("Year")
+            self._cube[(dim, metric)] = table
+        return self._cube[(dim, metric)]
+
+    def _cube_slice(self, params: Dict[str, Any], key: str) -> Optional[pd.DataFrame]:
+        """Pre-summed [key, metric] rows for an unfiltered single-calendar-year query, else None."""
+        t = params["time_window"]
+        if params["filters"] or not t: return None
+        start, end = t
+        year = start.year
+        if start != pd.Timestamp(year=year, month=1, day=1) or end != pd.Timestamp(year=year, month=12, day=31):
+            return None
+        table = self._cube_table(key, params["metric"])
+        if table is None or year not in table.columns: return None
+        return table[year].dropna().rename(params["metric"]).reset_index()
+
+    def _polars_frame(self):
+        """LazyFrame over self.df for large frames, built on first use; None otherwise."""
+        if self._lf is None:
+            if len(self.df) < POLARS_MIN_ROWS: return None
+            pl = _import_polars()
+            if pl is None: return None
+            self._lf = pl.from_pandas(self.df).lazy()
+        return self._lf
+
+    def _polars_select(self, lf, t: Optional[Tuple[pd.Timestamp, pd.Timestamp]], filters: Dict[str, str],
+                       columns: List[str]) -> pd.DataFrame:
+        """Slice + filter as one lazy Polars scan; returns the matching rows, in frame order."""
+        pl = _import_polars()
+        sl = self._time_slice(t)
+        if sl != slice(None):
+            lf = lf.slice(sl.start, max(sl.stop - sl.start, 0))
         for col, val in filters.items():
-            if col in df.columns:
-                df = df[df[col].astype(str).str.lower() == val.lower()]
+            if col not in self.df.columns: continue
+            if col in self._lower_codes:
+                code = self._lower_codes[col].get(val.lower())
+                if code is None:
+                    return self.df.iloc[:0][columns]
+                lf = lf.filter(pl.col(col) == str(self.df[col].cat.categories[code]))
+            else:
+                lf = lf.filter(pl.col(col).cast(pl.Utf8).str.to_lowercase() == val.lower())
+        df = lf.select(columns).collect().to_pandas()
+        # Back to the frame's category order so groupby output and ties match the pandas path
+        for col in columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype) and col in self._lower_codes:
+                df[col] = df[col].cat.set_categories(self.df[col].cat.categories)
         return df
 
     def run(self, params: Dict[str, Any]) -> pd.DataFrame:
-        df = self.df.copy()
-        df = self._apply_time(df, params["time_window"])
-        df = self._apply_filters(df, params["filters"])
-        if df.empty: return df
-
         metric = params["metric"]
         group_dim = params["group_dim"]
         topn = params["topn"]
+        dim = topn[1] if topn else group_dim
+        key = "Month" if dim == "MonthName" else dim
+
+        agg = self._cube_slice(params, key) if dim else None
+        if agg is None:
+            # Rows come from Polars on very large frames; the sums are always pandas', so
+            # printed cents never depend on which optional packages are installed
+            lf = self._polars_frame()
+            if lf is not None:
+                columns = [key, metric] if dim else [metric]
+                df = self._polars_select(lf, params["time_window"], params["filters"], columns)
+            else:
+                df = self._select(params["time_window"], params["filters"])
+            if df.empty: return df
+            if not dim:
+                return pd.DataFrame({metric: [df[metric].sum()]})
+            agg = df.groupby(key, as_index=False, observed=True)[metric].sum()
 
         if topn:
-            n, dim = topn
-            agg = df.groupby(dim, as_index=False)[metric].sum()
-            return agg.sort_values(metric, ascending=False).head(n)
-
-        if group_dim:
-            agg = df.groupby(group_dim, as_index=False)[metric].sum()
-            if group_dim == "MonthName" and "MonthIndex" in df.columns:
-                month_map = df[["MonthName", "MonthIndex"]].drop_duplicates()
-                agg = agg.merge(month_map, on="MonthName", how="left")
-                agg = agg.sort_values("MonthIndex").drop(columns=["MonthIndex"])
-            else:
-                agg = agg.sort_values(metric, ascending=False)
-            return agg.reset_index(drop=True)
+            return agg.sort_values(metric, ascending=False).head(topn[0])
+
+        if group_dim == "MonthName":
+            # Names are only materialized for the ~12 result rows
+            agg = agg.sort_values("Month")
+            agg.insert(0, "MonthName", agg["Month"].map(MONTH_ABBR))
+            return agg.drop(columns=["Month"]).reset_index(drop=True)
 
-        return pd.DataFrame({metric: [df[metric].sum()]})
+        agg = agg.sort_values(metric, ascending=False)
+        return agg.reset_index(drop=True)
 
     @staticmethod
     def _fmt_currency(x: float) -> str:
@@ -242,13 +572,24 @@ class SalesQueryEngine:
 
         if group_dim or topn:
             dim = topn[1] if topn else group_dim
-            parts = [f"{r[dim]}: {self._fmt_currency(r[metric])}" for _, r in result.iterrows()]
+            dims = result[dim].to_numpy()
+            vals = result[metric].to_numpy()
+            parts = [f"{d}: ${v:,.2f}" for d, v in zip(dims, vals)]
             return f"{prefix} by {dim} — " + "; ".join(parts) + "."
         return f"{prefix} — {self._fmt_currency(result.iloc[0][metric])}."
 
 
+# -------------------------------
+# Engine cache (keyed by file mtime)
+# -------------------------------
+@lru_cache(maxsize=4)
+def _get_engine(csv_path: str, mtime_ns: int) -> SalesQueryEngine:
+    """Build one engine per (path, mtime); editing the CSV invalidates the entry."""
+    return SalesQueryEngine(csv_path)
+
+
 def ask_question(question: str, csv_path: str = "data/Sample - Superstore.csv") -> str:
-    eng = SalesQueryEngine(csv_path)
+    eng = SalesQueryEngine.warmup(csv_path)
     p = eng.parse(question)
     r = eng.run(p)
     return eng.format_answer(p, r)